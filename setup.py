@@ -26,6 +26,21 @@ setup(
         "protego>=0.3.0",
     ],
     extras_require={
+        "http2": [
+            "httpx[http2]>=0.27.0",
+        ],
+        "compression": [
+            "httpx[brotli,zstd]>=0.27.1",
+        ],
+        "near-dedup": [
+            "datasketch>=1.5",
+        ],
+        "fast-html": [
+            "selectolax>=0.3.12",
+        ],
+        "uvloop": [
+            "uvloop>=0.17; platform_system != 'Windows'",
+        ],
         "dev": [
             "pytest>=6.0",
             "pytest-cov>=2.0",
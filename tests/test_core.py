@@ -6,13 +6,31 @@ Unit tests for textnano core functionality
 import unittest
 import tempfile
 import os
+import asyncio
+import threading
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
 from pathlib import Path
+from unittest import mock
 
+import httpx
+
+from textnano import core
 from textnano.core import (
     clean_html,
+    TextExtractor,
     text_fingerprint,
+    fingerprint_many,
     is_duplicate,
-    download_and_clean
+    batch_dedup,
+    download_and_clean,
+    download_and_clean_async,
+    download_text_async,
+    get_robots_parser,
+    open_robots_cache,
+    close_robots_cache,
+    is_near_duplicate,
+    create_near_duplicate_index,
 )
 
 
@@ -35,6 +53,11 @@ class TestCleanHTML(unittest.TestCase):
         self.assertNotIn('color', result)
         self.assertIn('Content', result)
 
+    def test_boilerplate_removed(self):
+        """Test that header, nav and footer text is dropped"""
+        html = '<header>Site</header><nav>Home | About</nav><p>Article</p><footer>(c) 2024</footer>'
+        self.assertEqual(clean_html(html), 'Article')
+
     def test_remove_html_tags(self):
         """Test that HTML tags are removed"""
         html = '<div><p>Hello <strong>World</strong></p></div>'
@@ -73,6 +96,95 @@ class TestCleanHTML(unittest.TestCase):
         self.assertIn('Text', result)
 
 
+class TestWordCount(unittest.TestCase):
+    """Test word counting on cleaned text"""
+
+    def test_matches_split_on_clean_output(self):
+        """Test that the count agrees with str.split on clean_html output"""
+        for content in ('', '<p>one</p>', '<p>  Hello\n\n<b>big</b>   world  </p>'):
+            text = clean_html(content)
+            self.assertEqual(core._word_count(text), len(text.split()))
+
+
+@unittest.skipUnless(core._HAS_SELECTOLAX, "selectolax not installed")
+class TestCleanHTMLLexbor(unittest.TestCase):
+    """Test behavior specific to the Lexbor parser path"""
+
+    def test_unclosed_script_removed(self):
+        """Test that an unterminated script does not leak code into the text"""
+        html = '<p>Intro</p><script>var secret = 1; if (a < b) { run(); }'
+        result = clean_html(html)
+        self.assertEqual('Intro', result)
+
+    def test_malformed_nesting(self):
+        """Test that badly nested markup still yields its text"""
+        html = '<div><p>One <b>two</p> three</div></b><style>p {}'
+        result = clean_html(html)
+        self.assertEqual('One two three', result)
+
+    def test_inline_tags_do_not_split_words(self):
+        """Test that inline markup inside a word keeps the word whole"""
+        self.assertEqual(clean_html('<p>wor<b>ld</b> <i>x</i>y</p><div>next</div>'), 'world xy next')
+
+
+class TestCleanHTMLRegex(TestCleanHTML):
+    """Test the regex fallback used when selectolax is not installed"""
+
+    def setUp(self):
+        patcher = mock.patch.object(core, '_HAS_SELECTOLAX', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_script_style_case_insensitive(self):
+        """Test that uppercase and attributed script/style blocks are removed"""
+        html = '<SCRIPT type="x">var a;</Script><p>Keep</p><style media="all">p{}</STYLE>'
+        self.assertEqual(clean_html(html), 'Keep')
+
+    def test_script_prefix_tag_is_not_script(self):
+        """Test that a tag merely starting with 'script' keeps its content"""
+        self.assertEqual(clean_html('<scripted>Keep this</scripted>'), 'Keep this')
+
+    def test_boilerplate_prefix_tag_is_kept(self):
+        """Test that a tag merely starting with 'nav' keeps its content"""
+        self.assertEqual(clean_html('<NAV class="top">Menu</nav><navbar>Keep</navbar>'), 'Keep')
+
+    def test_comment_with_gt_dropped(self):
+        """Test that a '>' inside a comment does not end it"""
+        self.assertEqual(clean_html('<p>a <!-- x > y --> b</p>'), 'a b')
+
+    def test_unterminated_script_drops_rest(self):
+        """Test that an unclosed script swallows the rest of the page, as browsers do"""
+        self.assertEqual(clean_html('<p>Before</p><script>var x = "<p>";'), 'Before')
+
+
+class TestTextExtractor(unittest.TestCase):
+    """Test the incremental extractor used for streamed downloads"""
+
+    def _extract(self, html, chunk_size=7):
+        extractor = TextExtractor()
+        for i in range(0, len(html), chunk_size):
+            extractor.feed(html[i:i + chunk_size])
+        extractor.close()
+        return extractor.text()
+
+    def test_matches_clean_html(self):
+        """Test that chunked extraction gives the same text as clean_html"""
+        html = ('<html><head><style>body { color: red; }</style></head><body>'
+                '<script>alert("x")</script><p>Hello   <b>World</b> &amp; more</p></body></html>')
+        self.assertEqual(self._extract(html), 'Hello World & more')
+        self.assertEqual(self._extract(html), clean_html(html))
+
+    def test_boilerplate_dropped(self):
+        """Test that header, nav and footer are dropped as clean_html drops them"""
+        html = '<header>Menu</header><nav><a>Home</a></nav><p>Body</p><footer>(c)</footer>'
+        self.assertEqual(self._extract(html), 'Body')
+        self.assertEqual(self._extract(html), clean_html(html))
+
+    def test_unclosed_script_dropped(self):
+        """Test that an unterminated script is not emitted as text"""
+        self.assertEqual(self._extract('<p>Intro</p><script>var x = 1;'), 'Intro')
+
+
 class TestTextFingerprint(unittest.TestCase):
     """Test text fingerprinting functionality"""
 
@@ -114,14 +226,35 @@ class TestTextFingerprint(unittest.TestCase):
         text = "short"
         fp = text_fingerprint(text, n=10)
         self.assertIsNotNone(fp)
-        self.assertIsInstance(fp, str)
+        self.assertIsInstance(fp, bytes)
+
+    def test_long_document_uses_prefix(self):
+        """Test that only the first n words matter, even past the scanned head"""
+        words = [f"w{i}" for i in range(8)]
+        text1 = ' '.join(words) + ' tail' * 1000
+        text2 = ' '.join(words) + ' other' * 1000
+        self.assertEqual(text_fingerprint(text1), text_fingerprint(text2))
+
+    def test_long_words_beyond_head(self):
+        """Test that words running past the scanned head are still distinguished"""
+        text1 = 'a' * 600 + ' first'
+        text2 = 'a' * 600 + ' second'
+        self.assertNotEqual(text_fingerprint(text1), text_fingerprint(text2))
 
     def test_fingerprint_format(self):
-        """Test that fingerprint is a valid MD5 hash"""
+        """Test that fingerprint is a 64-bit BLAKE2b digest"""
         text = "test text"
         fp = text_fingerprint(text)
-        self.assertEqual(len(fp), 32)  # MD5 hash length
-        self.assertTrue(all(c in '0123456789abcdef' for c in fp))
+        self.assertIsInstance(fp, bytes)
+        self.assertEqual(len(fp), 8)
+
+    def test_fingerprint_many(self):
+        """Test that batch fingerprints match the single-text fingerprints"""
+        texts = ["first text", "second text", "FIRST TEXT"]
+        fps = fingerprint_many(texts)
+        self.assertEqual(fps.typecode, 'Q')
+        self.assertEqual(list(fps), [int.from_bytes(text_fingerprint(t), 'little') for t in texts])
+        self.assertEqual(fps[0], fps[2])
 
 
 class TestIsDuplicate(unittest.TestCase):
@@ -163,6 +296,33 @@ class TestIsDuplicate(unittest.TestCase):
         result = is_duplicate(text2, seen)
         self.assertTrue(result)
 
+    def test_batch_matches_sequential(self):
+        """Test that batch_dedup flags the same texts as repeated is_duplicate calls"""
+        texts = ["First text", "Second text", "first TEXT", "Third text", "second text"]
+        seen = set()
+        expected = [is_duplicate(t, seen) for t in texts]
+        self.assertEqual(batch_dedup(texts, set()), expected)
+
+
+@unittest.skipUnless(core._HAS_DATASKETCH, "datasketch not installed")
+class TestIsNearDuplicate(unittest.TestCase):
+    """Test MinHash-LSH near-duplicate detection"""
+
+    body = ' '.join(f"word{i}" for i in range(200))
+
+    def test_different_header_same_body(self):
+        """Test that pages differing only in their header are near-duplicates"""
+        lsh = create_near_duplicate_index()
+        self.assertFalse(is_near_duplicate("Site A header " + self.body, lsh))
+        self.assertTrue(is_near_duplicate("Another site header here " + self.body, lsh))
+
+    def test_unrelated_texts_not_duplicate(self):
+        """Test that unrelated texts are kept"""
+        lsh = create_near_duplicate_index()
+        other = ' '.join(f"other{i}" for i in range(200))
+        self.assertFalse(is_near_duplicate(self.body, lsh))
+        self.assertFalse(is_near_duplicate(other, lsh))
+
 
 class TestDownloadAndClean(unittest.TestCase):
     """Test end-to-end download and clean functionality"""
@@ -250,6 +410,50 @@ class TestDownloadAndClean(unittest.TestCase):
 
         self.assertGreater(stats['excluded'], 0)
 
+    def test_bad_scheme_exclusion(self):
+        """Test that non-http(s) URLs are excluded without being fetched"""
+        with open(self.urls_file, 'w') as f:
+            f.write('mailto:someone@example.com\n')
+            f.write('javascript:void(0)\n')
+
+        stats = download_and_clean(self.urls_file, self.output_dir)
+
+        self.assertEqual(stats['excluded'], 2)
+        with open(os.path.join(self.output_dir, 'failed.txt')) as f:
+            self.assertEqual(f.read().count('\tbad_scheme'), 2)
+
+    def test_repeated_urls_processed_once(self):
+        """Test that a URL listed twice is only processed once"""
+        with open(self.urls_file, 'w') as f:
+            f.write('mailto:someone@example.com\n')
+            f.write('\n')
+            f.write('mailto:someone@example.com\n')
+
+        stats = download_and_clean(self.urls_file, self.output_dir)
+
+        self.assertEqual(stats['excluded'], 1)
+
+    def test_repeated_urls_skipped_and_logged(self):
+        """Test that repeated URLs are skipped, counted in the log, and max_urls counts distinct URLs"""
+        with open(self.urls_file, 'w') as f:
+            f.write('https://a.example/\nhttps://b.example/\nhttps://a.example/\nhttps://c.example/\n')
+
+        with self.assertLogs(level='INFO') as logs:
+            urls = core._read_urls(self.urls_file, max_urls=2)
+
+        self.assertEqual(urls, ['https://a.example/', 'https://b.example/'])
+        self.assertIn('Skipped 1 repeated URLs', logs.output[0])
+
+    def test_distinct_urls_never_dropped(self):
+        """Test that URL dedup stays exact even when TEXTNANO_BLOOM is set"""
+        with open(self.urls_file, 'w') as f:
+            f.writelines(f"https://example.com/{i}\n" for i in range(20_000))
+
+        with mock.patch.dict(os.environ, {'TEXTNANO_BLOOM': '1'}):
+            urls = core._read_urls(self.urls_file)
+
+        self.assertEqual(len(urls), 20_000)
+
     def test_stats_structure(self):
         """Test that returned stats have correct structure"""
         with open(self.urls_file, 'w') as f:
@@ -263,6 +467,272 @@ class TestDownloadAndClean(unittest.TestCase):
         self.assertIn('too_short', stats)
         self.assertIn('excluded', stats)
 
+    def test_async_log_write_error_raises(self):
+        """Test that a failing log write ends the async crawl with the error instead of hanging"""
+        with open(self.urls_file, 'w') as f:
+            f.write('mailto:someone@example.com\n')
+        log_file = mock.MagicMock()
+        log_file.write.side_effect = OSError(28, 'No space left on device')
+
+        def fake_open(path, *args, **kwargs):
+            return log_file if path.startswith(self.output_dir) else open(path, *args, **kwargs)
+
+        async def run():
+            with mock.patch('textnano.core.open', side_effect=fake_open, create=True):
+                await asyncio.wait_for(download_and_clean_async(self.urls_file, self.output_dir,
+                                                                respect_robots=False), timeout=5)
+
+        with self.assertRaises(OSError) as cm:
+            asyncio.run(run())
+        self.assertEqual(cm.exception.errno, 28)  # Not the wait_for timeout
+        log_file.close.assert_called()
+
+
+class TestSplitUrl(unittest.TestCase):
+    """Test the netloc/path splitter used by the exclusion filters"""
+
+    def test_netloc_and_path(self):
+        """Test that query and fragment are dropped and case is folded"""
+        self.assertEqual(core._split_url('HTTPS://Example.com:8080/Docs/File.PDF?x=1#top'),
+                         ('example.com:8080', '/docs/file.pdf'))
+
+    def test_path_params_dropped(self):
+        """Test that ;params after the last segment do not hide the extension"""
+        self.assertEqual(core._split_url('https://example.com/doc.pdf;jsessionid=1'), ('example.com', '/doc.pdf'))
+
+    def test_no_path(self):
+        """Test a bare host URL"""
+        self.assertEqual(core._split_url('https://example.com'), ('example.com', ''))
+
+    def test_not_a_url(self):
+        """Test that non-URLs yield empty parts"""
+        self.assertEqual(core._split_url('not a url'), ('', ''))
+
+
+class TestExclusionReason(unittest.TestCase):
+    """Test the shared pre-download URL filter"""
+
+    def setUp(self):
+        self.domain_re, self.suffixes = core._build_exclude_filters(['spam.com'], ['PDF'], False)
+
+    def reason(self, url):
+        return core._exclusion_reason(url, self.domain_re, self.suffixes)
+
+    def test_reasons(self):
+        """Test each reason tag and the pass-through case"""
+        self.assertEqual(self.reason('mailto:a@b.c'), 'bad_scheme')
+        self.assertEqual(self.reason('https://www.SPAM.com/page'), 'excluded_domain')
+        self.assertEqual(self.reason('https://ok.org/file.pdf?x=1'), 'excluded_extension')
+        self.assertIsNone(self.reason('https://ok.org/page'))
+
+    def test_scheme_case_insensitive(self):
+        """Test that an uppercase scheme is not rejected as bad_scheme"""
+        self.assertIsNone(self.reason('HTTP://Example.com/'))
+        self.assertIsNone(self.reason('Https://ok.org/page'))
+
+    def test_no_filters(self):
+        """Test that only the scheme check applies when the lists are empty"""
+        self.assertIsNone(core._exclusion_reason('http://spam.com/a.pdf', None, ()))
+
+
+class TestDownloadTextAsync(unittest.TestCase):
+    """Test streamed downloads"""
+
+    def _download(self, response, **kwargs):
+        async def run():
+            transport = httpx.MockTransport(lambda request: response)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await download_text_async('https://example.com/page', client,
+                                                 respect_robots=False, **kwargs)
+        return asyncio.run(run())
+
+    def test_html_is_cleaned(self):
+        """Test that HTML responses are downloaded and cleaned"""
+        response = httpx.Response(200, html='<p>Hello <b>World</b></p>')
+        self.assertEqual(self._download(response), 'Hello World')
+
+    def test_non_text_content_type_rejected(self):
+        """Test that binary content types are skipped"""
+        response = httpx.Response(200, content=b'%PDF-1.4', headers={'Content-Type': 'application/pdf'})
+        self.assertEqual(self._download(response), '')
+
+    def test_oversized_body_rejected(self):
+        """Test that bodies larger than max_bytes are skipped"""
+        response = httpx.Response(200, html='<p>' + 'word ' * 1000 + '</p>')
+        self.assertEqual(self._download(response, max_bytes=100), '')
+
+    def test_comment_with_gt(self):
+        """Test that a '>' inside a comment does not leak the rest of the comment"""
+        response = httpx.Response(200, html='<p>a <!-- x > y --> b</p>')
+        self.assertEqual(self._download(response), 'a b')
+
+
+class TestDownloadTextAsyncRegex(TestDownloadTextAsync):
+    """Test streamed downloads through the regex cleaner when selectolax is absent"""
+
+    def setUp(self):
+        patcher = mock.patch.object(core, '_HAS_SELECTOLAX', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestDownloadText(TestDownloadTextAsync):
+    """Test that sync downloads stream with the same limits and cleaner as async ones"""
+
+    def _download(self, response, **kwargs):
+        client = httpx.Client(transport=httpx.MockTransport(lambda request: response))
+        self.addCleanup(client.close)
+        with mock.patch.object(core, '_get_sync_client', return_value=client):
+            return core.download_text('https://example.com/page', **kwargs)
+
+
+class TestDownloadTextRegex(TestDownloadText):
+    """Test sync downloads through the regex cleaner when selectolax is absent"""
+
+    def setUp(self):
+        patcher = mock.patch.object(core, '_HAS_SELECTOLAX', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPipelineLocalServer(unittest.TestCase):
+    """Test both pipelines end to end against a local HTTP server"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.site_dir = os.path.join(self.temp_dir, 'site')
+        self.urls_file = os.path.join(self.temp_dir, 'urls.txt')
+        self.output_dir = os.path.join(self.temp_dir, 'output')
+        os.makedirs(self.site_dir)
+
+        for name in ('a', 'b', 'c'):
+            words = ' '.join(f"{name}{i}" for i in range(60))
+            with open(os.path.join(self.site_dir, f'{name}.html'), 'w') as f:
+                f.write(f'<html><body><p>{words}</p></body></html>')
+        with open(os.path.join(self.site_dir, 'short.html'), 'w') as f:
+            f.write('<p>Too short</p>')
+        with open(os.path.join(self.site_dir, 'copy.html'), 'w') as f:
+            f.write(open(os.path.join(self.site_dir, 'a.html')).read())
+
+        handler = partial(_QuietHandler, directory=self.site_dir)
+        self.server = HTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        import shutil
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write_urls(self):
+        with open(self.urls_file, 'w') as f:
+            for name in ('a.html', 'b.html', 'c.html', 'short.html', 'copy.html', 'missing.html', 'doc.pdf'):
+                f.write(f"{self.base}/{name}\n")
+
+    def test_sync_pipeline_with_thread_pool(self):
+        """Test that threaded downloads keep URL order for numbering and stats"""
+        self._write_urls()
+
+        stats = download_and_clean(self.urls_file, self.output_dir, max_workers=4)
+
+        self.assertEqual(stats, {'success': 3, 'failed': 1, 'duplicates': 1, 'too_short': 1, 'excluded': 1})
+        with open(os.path.join(self.output_dir, '0002.txt')) as f:
+            self.assertEqual(f.readline().strip(), f"{self.base}/b.html")
+
+    def test_pipeline_stats_and_outputs(self):
+        """Test that saves, failures, duplicates and exclusions are all accounted for"""
+        self._write_urls()
+
+        with self.assertLogs(level='INFO') as logs:
+            stats = asyncio.run(download_and_clean_async(
+                self.urls_file, self.output_dir, respect_robots=False, max_per_host=2
+            ))
+
+        self.assertEqual(stats['success'], 3)
+        self.assertEqual(stats['too_short'], 1)
+        self.assertEqual(stats['duplicates'], 1)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['excluded'], 1)
+
+        saved = sorted(p.name for p in Path(self.output_dir).glob('[0-9]*.txt'))
+        self.assertEqual(saved, ['0001.txt', '0002.txt', '0003.txt'])
+        with open(os.path.join(self.output_dir, 'success.txt')) as f:
+            self.assertEqual(len(f.read().split()), 3)
+        with open(os.path.join(self.output_dir, 'failed.txt')) as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+        # Progress is aggregated rather than logged per URL
+        self.assertIn('[7/7] ok=3 fail=1 dup=1 short=1 excluded=1', logs.output[-1])
+        self.assertFalse(any(self.base in r.getMessage()
+                             for r in logs.records if r.name == 'root' and r.levelname == 'INFO'))
+
+
+class TestRobotsCache(unittest.TestCase):
+    """Test on-disk robots.txt caching"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'robots.db')
+        core._robots_cache.clear()
+
+    def tearDown(self):
+        import shutil
+        close_robots_cache()
+        core._robots_cache.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _fetch(self, handler, url):
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await get_robots_parser(client, url)
+        return asyncio.run(run())
+
+    def test_robots_persisted_across_runs(self):
+        """Test that a cached robots.txt is reused without refetching"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            return httpx.Response(200, text="User-agent: *\nDisallow: /private")
+
+        open_robots_cache(self.db_path)
+        self._fetch(handler, 'https://example.com/page')
+        close_robots_cache()
+        core._robots_cache.clear()
+
+        open_robots_cache(self.db_path)
+        parser = self._fetch(handler, 'https://example.com/other')
+
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(parser.can_fetch('https://example.com/private', 'textnano'))
+        self.assertTrue(parser.can_fetch('https://example.com/public', 'textnano'))
+
+    def test_concurrent_lookups_fetch_once(self):
+        """Test that concurrent lookups for a new domain share one fetch"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, text="User-agent: *\nAllow: /")
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await asyncio.gather(*[
+                    get_robots_parser(client, f'https://example.com/{i}') for i in range(10)
+                ])
+
+        parsers = asyncio.run(run())
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(p is parsers[0] for p in parsers))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Unit tests for textnano URL extractors
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+
+import httpx
+
+from textnano.extractors import gutenberg
+from textnano.extractors.gutenberg import URL_TEMPLATES, extract_gutenberg_urls, rank_templates
+from textnano.extractors.wikipedia import extract_wikipedia_urls, _urls_in_file
+
+
+def _wiki_line(url, text='Some article text.'):
+    return json.dumps({'id': '1', 'revid': '2', 'url': url, 'title': 'T', 'text': text}) + '\n'
+
+
+class TestUrlsInFile(unittest.TestCase):
+    """Test the per-file URL parser used by the Wikipedia extractor"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.path = os.path.join(self.temp_dir, 'wiki_00')
+
+    def _parse(self, *lines):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        return _urls_in_file(self.path)
+
+    def test_plain_line(self):
+        """Test that an unescaped url field is read by the regex"""
+        self.assertEqual(self._parse(_wiki_line('https://en.wikipedia.org/wiki?curid=12')),
+                         ['https://en.wikipedia.org/wiki?curid=12'])
+
+    def test_escaped_url_falls_back_to_json(self):
+        """Test that a url with JSON escapes is decoded by json.loads"""
+        line = '{"id": "1", "url": "https:\\/\\/en.wikipedia.org\\/wiki?curid=\\u0031", "text": "x"}\n'
+        with mock.patch('textnano.extractors.wikipedia.json.loads', wraps=json.loads) as loads:
+            urls = self._parse(line)
+        self.assertEqual(urls, ['https://en.wikipedia.org/wiki?curid=1'])
+        loads.assert_called_once()
+
+    def test_url_string_inside_text_ignored(self):
+        """Test that a "url" key quoted inside the article text is not taken as the URL"""
+        text = 'Config: {"url": "https://fake.example/"}'
+        self.assertEqual(self._parse(_wiki_line('https://en.wikipedia.org/wiki?curid=3', text)),
+                         ['https://en.wikipedia.org/wiki?curid=3'])
+        # Escaped real URL: the regex must not fall through to the quoted text either
+        self.assertEqual(self._parse(_wiki_line('https://en.wikipedia.org/wiki?curid=4&x="y"', text)),
+                         ['https://en.wikipedia.org/wiki?curid=4&x="y"'])
+
+    def test_malformed_and_blank_lines_skipped(self):
+        """Test that blank lines and malformed JSON are skipped without error"""
+        urls = self._parse('\n', '{"id": "1", "text": broken\n', '   \n',
+                           _wiki_line('https://en.wikipedia.org/wiki?curid=5'))
+        self.assertEqual(urls, ['https://en.wikipedia.org/wiki?curid=5'])
+
+
+class TestExtractWikipediaUrls(unittest.TestCase):
+    """Test URL extraction over a wikiextractor output tree"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.input_dir = os.path.join(self.temp_dir, 'wiki')
+        self.output_file = os.path.join(self.temp_dir, 'urls.txt')
+        for sub in ('AA', 'AB'):
+            os.makedirs(os.path.join(self.input_dir, sub))
+            for idx in range(3):
+                with open(os.path.join(self.input_dir, sub, f'wiki_{idx:02d}'), 'w', encoding='utf-8') as f:
+                    f.write(_wiki_line(f'https://en.wikipedia.org/wiki?curid={sub}{idx}'))
+                    f.write(_wiki_line('https://en.wikipedia.org/wiki?curid=shared'))
+
+    def _output(self):
+        with open(self.output_file, encoding='utf-8') as f:
+            return f.read().split()
+
+    def test_serial_by_default(self):
+        """Test that no worker processes are started unless max_workers > 1"""
+        with mock.patch('textnano.extractors.wikipedia.ProcessPoolExecutor') as pool_cls:
+            count = extract_wikipedia_urls(self.input_dir, self.output_file)
+
+        pool_cls.assert_not_called()
+        self.assertEqual(count, 7)
+        urls = self._output()
+        self.assertEqual(urls[:3], ['https://en.wikipedia.org/wiki?curid=AA0',
+                                    'https://en.wikipedia.org/wiki?curid=shared',
+                                    'https://en.wikipedia.org/wiki?curid=AA1'])
+
+    def test_parallel_matches_serial(self):
+        """Test that worker processes give the same output as a serial run"""
+        extract_wikipedia_urls(self.input_dir, self.output_file)
+        serial = self._output()
+
+        extract_wikipedia_urls(self.input_dir, self.output_file, max_workers=2)
+
+        self.assertEqual(self._output(), serial)
+
+    def test_max_urls_stops_early_and_shuts_down_pool(self):
+        """Test that max_urls returns early and cancels the queued files"""
+        with mock.patch.object(ProcessPoolExecutor, 'shutdown', autospec=True,
+                               side_effect=ProcessPoolExecutor.shutdown) as shutdown:
+            count = extract_wikipedia_urls(self.input_dir, self.output_file, max_urls=3, max_workers=2)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(len(self._output()), 3)
+        self.assertTrue(any(call.kwargs.get('cancel_futures') for call in shutdown.call_args_list))
+
+
+def _gutenberg_handler(request):
+    """Mock Gutenberg: every book has files/{id}/{id}-0.txt, multiples of 3 also have the cache URL."""
+    path = request.url.path
+    book_id = int(path.split('/')[-2])
+    time.sleep(0.001 * (book_id % 5))  # Finish out of ID order
+    if path == f'/files/{book_id}/{book_id}-0.txt':
+        return httpx.Response(200)
+    if path == f'/cache/epub/{book_id}/pg{book_id}.txt' and book_id % 3 == 0:
+        return httpx.Response(200)
+    return httpx.Response(404)
+
+
+class TestGutenberg(unittest.TestCase):
+    """Test Gutenberg URL discovery against a mock server"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.output_file = os.path.join(self.temp_dir, 'urls.txt')
+
+    def test_rank_templates_is_deterministic(self):
+        """Test that the likeliest template is tried first and repeated runs agree"""
+        requested = []
+
+        def handler(request):
+            requested.append(str(request.url))
+            return _gutenberg_handler(request)
+
+        with httpx.Client(transport=httpx.MockTransport(handler)) as client, \
+             ThreadPoolExecutor(max_workers=4) as pool:
+            first = rank_templates(client, pool, max_id=1000, sample_size=20)
+            first_requests = sorted(requested)
+            requested.clear()
+            second = rank_templates(client, pool, max_id=1000, sample_size=20)
+
+        self.assertEqual(first, (URL_TEMPLATES[2], URL_TEMPLATES[0], URL_TEMPLATES[1], URL_TEMPLATES[3]))
+        self.assertEqual(second, first)
+        self.assertEqual(sorted(requested), first_requests)
+
+    def test_small_range_keeps_default_order(self):
+        """Test that ranges too small to sample keep URL_TEMPLATES order without requests"""
+        transport = httpx.MockTransport(lambda request: self.fail('unexpected request'))
+        with httpx.Client(transport=transport) as client:
+            self.assertEqual(rank_templates(client, None, max_id=100, sample_size=20), URL_TEMPLATES)
+
+    def test_urls_written_in_id_order(self):
+        """Test that concurrently checked IDs are written in ID order"""
+        real_client = httpx.Client
+
+        def mock_client(**kwargs):
+            return real_client(transport=httpx.MockTransport(_gutenberg_handler), **kwargs)
+
+        with mock.patch.object(gutenberg.httpx, 'Client', side_effect=mock_client):
+            count = extract_gutenberg_urls(self.output_file, max_id=30, max_workers=8)
+
+        with open(self.output_file) as f:
+            urls = f.read().split()
+        self.assertEqual(count, 30)
+        expected = [(f'http://www.gutenberg.org/cache/epub/{i}/pg{i}.txt' if i % 3 == 0
+                     else f'http://www.gutenberg.org/files/{i}/{i}-0.txt') for i in range(1, 31)]
+        self.assertEqual(urls, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
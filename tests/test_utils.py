@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Unit tests for textnano utilities
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from textnano.core import is_duplicate
+from textnano.config import BLOOM_MIN_CAPACITY, MERGE_HEAD_CHARS
+from textnano.utils import (BloomFilter, estimate_dataset_size, merge_datasets, _count_words, _expected_url_count,
+                            _new_fingerprint_store, _read_head)
+
+
+class TestEstimateDatasetSize(unittest.TestCase):
+    """Test dataset statistics"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_counts_only_numbered_files(self):
+        """Test that words and sizes come from numbered .txt files only"""
+        self._write('0001.txt', 'http://a.com\n\none two three')
+        self._write('0002.txt', 'http://b.com\n\nfour five')
+        self._write('success.txt', 'http://a.com\nhttp://b.com\n')
+
+        stats = estimate_dataset_size(self.temp_dir)
+
+        self.assertEqual(stats['files'], 2)
+        self.assertEqual(stats['words'], 7)
+        self.assertEqual(stats['chars'], 50)
+        self.assertEqual(stats['avg_words_per_file'], 3)
+
+    def test_empty_directory(self):
+        """Test that an empty dataset reports zeros"""
+        stats = estimate_dataset_size(self.temp_dir)
+        self.assertEqual(stats['files'], 0)
+        self.assertEqual(stats['avg_words_per_file'], 0)
+
+    def test_parallel_count_matches(self):
+        """Test that large datasets counted in worker processes give the same totals"""
+        for idx in range(1, 151):
+            self._write(f"{idx:04d}.txt", 'http://a.com\n\none two three')
+
+        stats = estimate_dataset_size(self.temp_dir, max_workers=2)
+
+        self.assertEqual(stats['files'], 150)
+        self.assertEqual(stats['words'], 600)
+
+    def test_serial_by_default(self):
+        """Test that no worker processes are started unless max_workers is set"""
+        for idx in range(1, 151):
+            self._write(f"{idx:04d}.txt", 'one two')
+
+        with mock.patch('textnano.utils.ProcessPoolExecutor') as pool_cls:
+            stats = estimate_dataset_size(self.temp_dir)
+
+        pool_cls.assert_not_called()
+        self.assertEqual(stats['words'], 300)
+
+    def test_word_count_across_chunk_boundaries(self):
+        """Test that chunked counting matches str.split for any chunk size"""
+        content = 'alpha  beta\tgamma\n\ndelta epsilon ' * 50
+        path = self._write('0001.txt', content)
+        for chunk_size in (1, 3, 7, 64, 1 << 16):
+            self.assertEqual(_count_words(path, chunk_size), len(content.split()))
+
+
+class TestMergeDatasets(unittest.TestCase):
+    """Test merging datasets"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_dataset(self, name, docs):
+        path = os.path.join(self.temp_dir, name)
+        os.makedirs(path)
+        for idx, doc in enumerate(docs, 1):
+            with open(os.path.join(path, f"{idx:04d}.txt"), 'w') as f:
+                f.write(doc)
+        return path
+
+    def test_merge_drops_duplicates_in_order(self):
+        """Test that duplicates are dropped and kept files are renumbered in input order"""
+        shared = 'http://a.com\n\none two three four five six seven eight'
+        first = self._make_dataset('d1', [shared, 'http://b.com\n\nsomething else entirely'])
+        second = self._make_dataset('d2', [shared, 'http://c.com\n\nyet another document'])
+        output = os.path.join(self.temp_dir, 'merged')
+
+        merge_datasets(first, second, output_dir=output, is_duplicate_func=is_duplicate)
+
+        self.assertEqual(sorted(os.listdir(output)), ['0001.txt', '0002.txt', '0003.txt'])
+        with open(os.path.join(output, '0003.txt')) as f:
+            self.assertEqual(f.read(), 'http://c.com\n\nyet another document')
+
+    def test_merge_passes_whole_file_unless_head_chars(self):
+        """Test that the callback gets full text by default and a head with head_chars"""
+        doc = 'http://a.com\n\n' + 'word ' * 1000
+        source = self._make_dataset('d1', [doc])
+        received = []
+
+        def record(text, seen):
+            received.append(text)
+            return False
+
+        merge_datasets(source, output_dir=os.path.join(self.temp_dir, 'm1'), is_duplicate_func=record)
+        merge_datasets(source, output_dir=os.path.join(self.temp_dir, 'm2'), is_duplicate_func=record,
+                       head_chars=100)
+        self.assertEqual(received, [doc, doc[:100]])
+
+    def test_default_dedup_reads_heads_only(self):
+        """Test that the default dedup reads only file heads but copies kept files whole"""
+        long_doc = 'http://a.com\n\none two three four five six seven eight ' + 'tail ' * 5000
+        first = self._make_dataset('d1', [long_doc, 'http://b.com\n\nsomething else entirely'])
+        second = self._make_dataset('d2', [long_doc])
+        output = os.path.join(self.temp_dir, 'merged')
+
+        with mock.patch('textnano.utils._read_head', wraps=_read_head) as read_head:
+            merge_datasets(first, second, output_dir=output)
+
+        self.assertEqual({c.kwargs['nchars'] for c in read_head.call_args_list}, {MERGE_HEAD_CHARS})
+        self.assertEqual(sorted(os.listdir(output)), ['0001.txt', '0002.txt'])
+        with open(os.path.join(output, '0001.txt')) as f:
+            self.assertEqual(f.read(), long_doc)
+
+    def test_reads_bounded_ahead_of_dedup(self):
+        """Test that files are read at most a small window ahead of the dedup loop"""
+        source = self._make_dataset('d1', [f'http://a.com/{i}\n\ndoc {i}' for i in range(10)])
+        events = []
+
+        def read(path, nchars=None):
+            events.append('read')
+            with open(path) as f:
+                return f.read()
+
+        def record(text, seen):
+            events.append('dedup')
+            return False
+
+        with mock.patch('textnano.utils._read_head', side_effect=read):
+            merge_datasets(source, output_dir=os.path.join(self.temp_dir, 'm'), is_duplicate_func=record,
+                           max_workers=1)
+
+        self.assertLessEqual(events.index('dedup'), 2)
+        self.assertEqual(events.count('dedup'), 10)
+
+
+class TestExpectedUrlCount(unittest.TestCase):
+    """Test the size-based URL count used to size dedup stores"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'urls.txt')
+        with open(self.path, 'w') as f:
+            f.write('x' * 6400)
+
+    def test_estimate_has_headroom(self):
+        """Test that the estimate exceeds the average-URL count"""
+        self.assertEqual(_expected_url_count([self.path]), 200)
+
+    def test_capped_by_max_urls(self):
+        """Test that max_urls caps the estimate"""
+        self.assertEqual(_expected_url_count([self.path], max_urls=10), 10)
+        self.assertEqual(_expected_url_count([self.path], max_urls=10_000), 200)
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Test the Bloom filter used for large-scale deduplication"""
+
+    def test_added_items_are_members(self):
+        """Test that every added item is reported as present"""
+        bloom = BloomFilter(capacity=1000)
+        items = [f"item{i}".encode() for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate(self):
+        """Test that unseen items are rarely reported as present"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"item{i}")
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_len_counts_distinct_items(self):
+        """Test that re-adding an item does not grow the filter"""
+        bloom = BloomFilter(capacity=100)
+        bloom.add(b"a")
+        bloom.add(b"a")
+        bloom.add(b"b")
+        self.assertEqual(len(bloom), 2)
+
+    def test_works_with_is_duplicate(self):
+        """Test that is_duplicate accepts a Bloom filter in place of a set"""
+        bloom = BloomFilter(capacity=100)
+        self.assertFalse(is_duplicate("Hello World Test", bloom))
+        self.assertTrue(is_duplicate("hello world test", bloom))
+
+    def test_forced_bloom_has_minimum_capacity(self):
+        """Test that TEXTNANO_BLOOM with a tiny estimate still gets a usable filter"""
+        with mock.patch.dict(os.environ, {'TEXTNANO_BLOOM': '1'}):
+            store = _new_fingerprint_store(1)
+        self.assertIsInstance(store, BloomFilter)
+        self.assertEqual(store.num_bits, BloomFilter(capacity=BLOOM_MIN_CAPACITY).num_bits)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,7 +12,11 @@ from textnano.core import (
     download_text_async,
     clean_html,
     text_fingerprint,
+    fingerprint_many,
     is_duplicate,
+    batch_dedup,
+    is_near_duplicate,
+    create_near_duplicate_index,
     download_and_clean,
     download_and_clean_async,
     estimate_dataset_size,
@@ -25,7 +29,11 @@ __all__ = [
     "download_text_async",
     "clean_html",
     "text_fingerprint",
+    "fingerprint_many",
     "is_duplicate",
+    "batch_dedup",
+    "is_near_duplicate",
+    "create_near_duplicate_index",
     "download_and_clean",
     "download_and_clean_async",
     "estimate_dataset_size",
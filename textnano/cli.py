@@ -1,14 +1,31 @@
 #!/usr/bin/env python3
 """CLI for textnano with extractor subcommands."""
 
+import os
 import sys
 import asyncio
 import argparse
-from textnano.core import download_and_clean_async, is_duplicate
+from textnano.core import download_and_clean_async
 from textnano.utils import estimate_dataset_size, merge_datasets
+from textnano.config import DEFAULT_MAX_BYTES
 from textnano.extractors import extract_wikipedia_urls, extract_reddit_urls, extract_gutenberg_urls
 
 
+def _run(coro):
+    """Run the crawler on uvloop's faster event loop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+
+    if sys.version_info >= (3, 11):
+        # uvloop.install() is deprecated from Python 3.12; pass the loop factory instead
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    uvloop.install()
+    return asyncio.run(coro)
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -32,10 +49,18 @@ def main():
                             help='Disable default exclusion lists')
     urls_parser.add_argument('--max-concurrent', '-c', type=int, default=10,
                             help='Maximum concurrent requests (default: 10)')
+    urls_parser.add_argument('--max-per-host', type=int, default=4,
+                            help='Maximum concurrent requests per host (default: 4)')
     urls_parser.add_argument('--no-robots', action='store_true',
                             help='Ignore robots.txt (not recommended)')
     urls_parser.add_argument('--timeout', '-t', type=int, default=30,
                             help='Request timeout in seconds (default: 30)')
+    urls_parser.add_argument('--robots-cache', metavar='DB',
+                            help='SQLite file to cache robots.txt across runs')
+    urls_parser.add_argument('--near-dedup', action='store_true',
+                            help='Also drop near-duplicate pages (requires datasketch)')
+    urls_parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES,
+                            help=f'Skip responses larger than this many bytes (default: {DEFAULT_MAX_BYTES})')
 
     # wikipedia command
     wiki_parser = subparsers.add_parser('wikipedia', help='Extract URLs from Wikipedia dump')
@@ -59,6 +84,8 @@ def main():
                                  help='Output URL file (default: gutenberg_urls.txt)')
     gutenberg_parser.add_argument('--max-id', type=int, default=58910,
                                  help='Maximum book ID (default: 58910)')
+    gutenberg_parser.add_argument('--max-workers', type=int, default=64,
+                                 help='Book IDs checked in parallel (default: 64)')
 
     # stats command
     stats_parser = subparsers.add_parser('stats', help='Show dataset statistics')
@@ -72,7 +99,7 @@ def main():
 
     # Handle commands
     if args.command == 'urls':
-        stats = asyncio.run(download_and_clean_async(
+        stats = _run(download_and_clean_async(
             args.url_file,
             args.output_dir,
             max_urls=args.max_urls,
@@ -80,25 +107,29 @@ def main():
             exclude_extensions=args.exclude_extensions,
             use_default_excludes=not args.no_default_excludes,
             max_concurrent=args.max_concurrent,
+            max_per_host=args.max_per_host,
             respect_robots=not args.no_robots,
-            timeout=args.timeout
+            timeout=args.timeout,
+            robots_cache=args.robots_cache,
+            near_duplicates=args.near_dedup,
+            max_bytes=args.max_bytes
         ))
-        dataset_stats = estimate_dataset_size(args.output_dir)
+        dataset_stats = estimate_dataset_size(args.output_dir, max_workers=os.cpu_count())
         print(f"\nDataset: {dataset_stats['files']} files, "
               f"{dataset_stats['words']:,} words, "
               f"{dataset_stats['mb']:.1f} MB")
 
     elif args.command == 'wikipedia':
-        extract_wikipedia_urls(args.input_dir, args.output, args.max)
+        extract_wikipedia_urls(args.input_dir, args.output, args.max, max_workers=os.cpu_count())
 
     elif args.command == 'reddit':
         extract_reddit_urls(args.input_dir, args.output, args.max)
 
     elif args.command == 'gutenberg':
-        extract_gutenberg_urls(args.output, args.max_id)
+        extract_gutenberg_urls(args.output, args.max_id, args.max_workers)
 
     elif args.command == 'stats':
-        stats = estimate_dataset_size(args.dir)
+        stats = estimate_dataset_size(args.dir, max_workers=os.cpu_count())
         print(f"Files:     {stats['files']}")
         print(f"Words:     {stats['words']:,}")
         print(f"Size:      {stats['mb']:.1f} MB")
@@ -107,7 +138,7 @@ def main():
     elif args.command == 'merge':
         output = args.dirs[-1]
         inputs = args.dirs[:-1]
-        merge_datasets(*inputs, output_dir=output, is_duplicate_func=is_duplicate)
+        merge_datasets(*inputs, output_dir=output)
 
     else:
         parser.print_help()
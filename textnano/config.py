@@ -47,6 +47,10 @@ DEFAULT_EXCLUDE_EXTENSIONS = [
     'tar', 'tgz', 'webm', 'wma', 'wmv', 'xml', 'xz', 'zip'
 ]
 
+# Set views for O(1) membership tests and cheap unions with user-supplied lists
+DEFAULT_EXCLUDE_DOMAINS_SET = frozenset(DEFAULT_EXCLUDE_DOMAINS)
+DEFAULT_EXCLUDE_EXTENSIONS_SET = frozenset(DEFAULT_EXCLUDE_EXTENSIONS)
+
 # =============================================================================
 # USER AGENT ROTATION
 # =============================================================================
@@ -61,3 +65,47 @@ DEFAULT_USER_AGENTS = [
     'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
 ]
+
+# =============================================================================
+# RESPONSE LIMITS
+# =============================================================================
+
+# Responses with any other Content-Type are dropped before the body is read
+ALLOWED_CONTENT_TYPES = frozenset({'text/html', 'application/xhtml+xml', 'text/plain'})
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024  # Larger response bodies are abandoned mid-download
+
+CONNECT_TIMEOUT = 10.0  # Seconds to establish a connection, capped by the request timeout
+KEEPALIVE_EXPIRY = 30.0  # Seconds an idle pooled connection is kept for reuse
+SYNC_POOL_SIZE = 32  # Pooled connections shared by download_text's worker threads
+
+# =============================================================================
+# ROBOTS.TXT CACHE
+# =============================================================================
+
+ROBOTS_CACHE_TTL = 24 * 60 * 60  # Seconds before an on-disk robots.txt entry is refetched
+
+# =============================================================================
+# OUTPUT LOGS
+# =============================================================================
+
+LOG_BUFFER_SIZE = 1 << 20  # Bytes buffered per success/failed log before hitting disk
+LOG_FLUSH_INTERVAL = 100   # Flush both logs after this many written entries
+PROGRESS_LOG_INTERVAL = 1.0  # Seconds between async crawl progress lines
+
+# =============================================================================
+# DEDUPLICATION
+# =============================================================================
+
+BLOOM_DEDUP_THRESHOLD = 100_000  # Runs with more URLs track fingerprints in a Bloom filter
+BLOOM_ERROR_RATE = 0.001         # False-positive rate (unique documents dropped as duplicates)
+BLOOM_MIN_CAPACITY = 10_000      # Floor for Bloom filters sized from rough estimates (~18 KB)
+AVG_URL_BYTES = 64               # Rough bytes per line of a URL file, to size stores from file size
+URL_ESTIMATE_HEADROOM = 2        # Size-based URL counts are multiplied by this, since short URLs beat the average
+
+# =============================================================================
+# DATASET STATS
+# =============================================================================
+
+PARALLEL_STATS_MIN_FILES = 100  # With max_workers set, count words in worker processes from this many files up
+MERGE_HEAD_CHARS = 4096         # Head of each document read by the default merge dedup (URL line + first words)
@@ -19,24 +19,55 @@ Dependencies: httpx, protego (for async parallel crawling with robots.txt suppor
 import os
 import re
 import html
-import urllib.request
+import codecs
+from html.parser import HTMLParser
 import hashlib
 import ssl
+import threading
+import atexit
 import logging
 import asyncio
 import random
+import itertools
+import sqlite3
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+import time
 from pathlib import Path
-from typing import Optional, Set, Dict, List
+from typing import Optional, Set, Dict, List, Tuple, Pattern, Iterable, Iterator
 from urllib.parse import urlparse, urljoin
 
 import httpx
 import protego
 
-from .config import DEFAULT_EXCLUDE_DOMAINS, DEFAULT_EXCLUDE_EXTENSIONS, DEFAULT_USER_AGENTS
-from .utils import print_stats, estimate_dataset_size, merge_datasets
+try:
+    import h2  # noqa: F401 - httpx only negotiates HTTP/2 when h2 is installed
+    _HAS_HTTP2 = True
+except ImportError:
+    _HAS_HTTP2 = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    _HAS_SELECTOLAX = True
+except ImportError:
+    _HAS_SELECTOLAX = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+    _HAS_DATASKETCH = True
+except ImportError:
+    _HAS_DATASKETCH = False
+
+from .config import (DEFAULT_EXCLUDE_DOMAINS_SET, DEFAULT_EXCLUDE_EXTENSIONS_SET, DEFAULT_USER_AGENTS,
+                     ROBOTS_CACHE_TTL, LOG_BUFFER_SIZE, LOG_FLUSH_INTERVAL, ALLOWED_CONTENT_TYPES,
+                     DEFAULT_MAX_BYTES, CONNECT_TIMEOUT,
+                     KEEPALIVE_EXPIRY, PROGRESS_LOG_INTERVAL, SYNC_POOL_SIZE)
+from .utils import print_stats, estimate_dataset_size, merge_datasets, _expected_url_count, _new_fingerprint_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
+logging.getLogger('httpx').setLevel(logging.WARNING)  # httpx logs every request at INFO
 
 
 # =============================================================================
@@ -46,9 +77,41 @@ logging.basicConfig(level=logging.INFO, format='%(message)s')
 # Global cache for robots.txt parsers
 _robots_cache: Dict[str, Optional[protego.Protego]] = {}
 
+# Per-domain locks held while a robots.txt fetch is in flight
+_robots_locks: Dict[str, asyncio.Lock] = {}
+
+# Optional on-disk robots.txt cache shared across runs (see open_robots_cache)
+_robots_db: Optional[sqlite3.Connection] = None
+
+
+# Pre-shuffled ring of user agents; next() on it avoids an RNG call per request
+_UA_RING = itertools.cycle(random.choices(DEFAULT_USER_AGENTS, k=4096))
+
 
 def get_random_user_agent() -> str:
-    return random.choice(DEFAULT_USER_AGENTS)
+    return next(_UA_RING)
+
+
+def open_robots_cache(path: str) -> None:
+    """Persist fetched robots.txt files to a SQLite database.
+
+    The in-memory cache stays in front of it; entries older than
+    ROBOTS_CACHE_TTL are refetched.
+    """
+    global _robots_db
+    close_robots_cache()
+    _robots_db = sqlite3.connect(path)
+    _robots_db.execute(
+        "CREATE TABLE IF NOT EXISTS robots (domain TEXT PRIMARY KEY, body TEXT, fetched_at REAL)"
+    )
+
+
+def close_robots_cache() -> None:
+    global _robots_db
+    if _robots_db is not None:
+        _robots_db.commit()
+        _robots_db.close()
+        _robots_db = None
 
 
 async def get_robots_parser(client: httpx.AsyncClient, url: str) -> Optional[protego.Protego]:
@@ -58,17 +121,38 @@ async def get_robots_parser(client: httpx.AsyncClient, url: str) -> Optional[pro
     if domain in _robots_cache:
         return _robots_cache[domain]
 
+    # Only the first coroutine for a new domain fetches; the rest wait for its result
+    lock = _robots_locks.setdefault(domain, asyncio.Lock())
+    async with lock:
+        if domain not in _robots_cache:
+            _robots_cache[domain] = await _fetch_robots_parser(client, domain)
+            _robots_locks.pop(domain, None)
+
+    return _robots_cache[domain]
+
+
+async def _fetch_robots_parser(client: httpx.AsyncClient, domain: str) -> Optional[protego.Protego]:
+    # A NULL body records a domain without a usable robots.txt
+    if _robots_db is not None:
+        row = _robots_db.execute(
+            "SELECT body, fetched_at FROM robots WHERE domain = ?", (domain,)
+        ).fetchone()
+        if row and time.time() - row[1] < ROBOTS_CACHE_TTL:
+            return protego.Protego.parse(row[0]) if row[0] is not None else None
+
     robots_url = urljoin(domain, "/robots.txt")
     try:
         response = await client.get(robots_url, timeout=10.0)
-        if response.status_code == 200:
-            parser = protego.Protego.parse(response.text)
-            _robots_cache[domain] = parser
-            return parser
+        body = response.text if response.status_code == 200 else None
+        parser = protego.Protego.parse(body) if body is not None else None
+        if _robots_db is not None:
+            _robots_db.execute(
+                "INSERT OR REPLACE INTO robots VALUES (?, ?, ?)", (domain, body, time.time())
+            )
+        return parser
     except Exception as e:
         logging.debug(f"Could not fetch robots.txt for {domain}: {e}")
 
-    _robots_cache[domain] = None
     return None
 
 
@@ -82,16 +166,64 @@ def can_fetch(robots_parser: Optional[protego.Protego], url: str, user_agent: st
 # DOWNLOAD
 # =============================================================================
 
+def _request_timeout(timeout: float) -> httpx.Timeout:
+    # Fail fast on unreachable hosts; reads and pool waits get the full budget
+    return httpx.Timeout(timeout, connect=min(timeout, CONNECT_TIMEOUT))
+
+
+def _skip_reason(response: httpx.Response, max_bytes: Optional[int]) -> Optional[str]:
+    """Why a response is rejected from its headers alone, or None to read the body."""
+    content_type = response.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+    if content_type and content_type not in ALLOWED_CONTENT_TYPES:
+        return f"Skipping {content_type} content"
+
+    content_length = response.headers.get('content-length', '')
+    if max_bytes and content_length.isdigit() and int(content_length) > max_bytes:
+        return f"Skipping {content_length}-byte response"
+    return None
+
+
+class _BodyText:
+    """Turns streamed body chunks into cleaned text, the same way for both download paths.
+
+    Chunks are decoded incrementally so raw bytes are dropped as they arrive;
+    the decoded text (at most max_bytes) is cleaned once with clean_html at the end.
+    """
+
+    def __init__(self, response: httpx.Response, max_bytes: Optional[int]):
+        self._decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        self._parts = []
+        self._size = 0
+        self._max_bytes = max_bytes
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add a chunk; False once the body exceeds max_bytes."""
+        self._size += len(chunk)
+        if self._max_bytes and self._size > self._max_bytes:
+            return False
+        self._parts.append(self._decoder.decode(chunk))
+        return True
+
+    def text(self) -> str:
+        self._parts.append(self._decoder.decode(b'', final=True))
+        return clean_html(''.join(self._parts))
+
+
 async def download_text_async(url: str, client: httpx.AsyncClient, timeout: int = 30,
-                               respect_robots: bool = True, user_agent: str = "textnano") -> str:
+                               respect_robots: bool = True, user_agent: str = "textnano",
+                               max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> str:
     """Download and extract text from a URL asynchronously.
 
+    The body is streamed: non-text Content-Types are rejected from the
+    headers alone and oversized bodies are abandoned at max_bytes.
+
     Args:
         url: URL to download
         client: httpx AsyncClient
         timeout: Request timeout in seconds
         respect_robots: Check robots.txt before fetching
         user_agent: User agent string
+        max_bytes: Maximum response body size (None = unlimited)
 
     Returns:
         str: Cleaned text content, or empty string if failed
@@ -111,11 +243,22 @@ async def download_text_async(url: str, client: httpx.AsyncClient, timeout: int
                     await asyncio.sleep(delay)
 
         headers = {'User-Agent': get_random_user_agent()}
-        response = await client.get(url, timeout=timeout, headers=headers, follow_redirects=True)
-        response.raise_for_status()
+        async with client.stream('GET', url, timeout=_request_timeout(timeout), headers=headers,
+                                 follow_redirects=True) as response:
+            response.raise_for_status()
+
+            reason = _skip_reason(response, max_bytes)
+            if reason:
+                logging.info(f"{reason}: {url}")
+                return ""
+
+            body = _BodyText(response, max_bytes)
+            async for chunk in response.aiter_bytes():
+                if not body.feed(chunk):
+                    logging.info(f"Response exceeds {max_bytes} bytes: {url}")
+                    return ""
 
-        content = response.text
-        return clean_html(content)
+        return body.text()
 
     except httpx.HTTPStatusError as e:
         logging.error(f"HTTP error {e.response.status_code} for {url}: {e}")
@@ -128,25 +271,55 @@ async def download_text_async(url: str, client: httpx.AsyncClient, timeout: int
         return ""
 
 
-def download_text(url: str, timeout: int = 30) -> str:
+# Built once: create_default_context() loads the system CA bundle on every call
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.check_hostname = False
+_SSL_CTX.verify_mode = ssl.CERT_NONE
+
+
+_sync_client: Optional[httpx.Client] = None
+_sync_client_lock = threading.Lock()
+
+
+def _get_sync_client() -> httpx.Client:
+    """Shared keep-alive client for download_text, safe to use from worker threads; closed at exit."""
+    global _sync_client
+    if _sync_client is None:
+        with _sync_client_lock:
+            if _sync_client is None:
+                limits = httpx.Limits(max_keepalive_connections=SYNC_POOL_SIZE, max_connections=SYNC_POOL_SIZE,
+                                      keepalive_expiry=KEEPALIVE_EXPIRY)
+                transport = httpx.HTTPTransport(verify=_SSL_CTX, limits=limits)
+                _sync_client = httpx.Client(transport=transport, follow_redirects=True)
+                atexit.register(_sync_client.close)
+    return _sync_client
+
+
+def download_text(url: str, timeout: int = 30, max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> str:
+    """Download and extract text from a URL, with the same streaming limits and cleaner as download_text_async."""
     try:
         headers = {'User-Agent': get_random_user_agent()}
-        req = urllib.request.Request(url, headers=headers)
+        with _get_sync_client().stream('GET', url, headers=headers, timeout=_request_timeout(timeout)) as response:
+            response.raise_for_status()
 
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
+            reason = _skip_reason(response, max_bytes)
+            if reason:
+                logging.info(f"{reason}: {url}")
+                return ""
 
-        with urllib.request.urlopen(req, timeout=timeout, context=context) as response:
-            content = response.read().decode('utf-8', errors='ignore')
+            body = _BodyText(response, max_bytes)
+            for chunk in response.iter_bytes():
+                if not body.feed(chunk):
+                    logging.info(f"Response exceeds {max_bytes} bytes: {url}")
+                    return ""
 
-        return clean_html(content)
+        return body.text()
 
-    except urllib.error.HTTPError as e:
-        logging.error(f"HTTP error {e.code} for {url}: {e.reason}")
+    except httpx.HTTPStatusError as e:
+        logging.error(f"HTTP error {e.response.status_code} for {url}: {e}")
         return ""
-    except urllib.error.URLError as e:
-        logging.error(f"URL error for {url}: {e.reason}")
+    except httpx.RequestError as e:
+        logging.error(f"Request error for {url}: {e}")
         return ""
     except Exception as e:
         logging.error(f"Unexpected error for {url}: {type(e).__name__}: {e}")
@@ -157,29 +330,150 @@ def download_text(url: str, timeout: int = 30) -> str:
 # CLEANING
 # =============================================================================
 
+# Elements whose contents are dropped along with the tags
+_RAW_TEXT_TAGS = ('script', 'style')
+_TAG_NAME_END = frozenset(' \t\n\r\f/>')
+
+# Page chrome dropped by every cleaner, and inline tags the Lexbor path unwraps
+# so that e.g. 'wor<b>ld</b>' stays one word when text is joined with separators
+_BOILERPLATE_TAGS = ('header', 'nav', 'footer')
+_DROPPED_TAGS = _RAW_TEXT_TAGS + _BOILERPLATE_TAGS
+_INLINE_TAGS = ('a', 'abbr', 'b', 'code', 'em', 'i', 'mark', 'small', 'span', 'strong', 'sub', 'sup', 'u')
+
+
 def clean_html(html_content: str) -> str:
-    text = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<[^>]+>', '', text)
-    text = html.unescape(text)
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'\n\s*\n', '\n\n', text)
-    text = text.strip()
+    if _HAS_SELECTOLAX:
+        return _clean_html_lexbor(html_content)
+    return _clean_html_regex(html_content)
+
+
+def _clean_html_lexbor(html_content: str) -> str:
+    # Lexbor parses in C and copes with malformed markup the regexes choke on
+    tree = LexborHTMLParser(html_content)
+    tree.strip_tags(list(_DROPPED_TAGS))
+    tree.unwrap_tags(list(_INLINE_TAGS))
+    tree.merge_text_nodes()
+    text = tree.body.text(separator=' ') if tree.body else ''
+    return ' '.join(text.split())
+
+
+class TextExtractor(HTMLParser):
+    """Incremental HTML-to-text converter for streamed responses.
+
+    Feed decoded chunks as they arrive; only text outside script, style and
+    page chrome (header, nav, footer) is kept, so memory stays proportional to the extracted text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip_depth = 0
 
-    return text
+    def handle_starttag(self, tag, attrs):
+        if tag in _DROPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in _DROPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def text(self) -> str:
+        """Extracted text with whitespace normalized, as clean_html returns it."""
+        return ' '.join(''.join(self._parts).split())
+
+
+def _raw_text_tag(text: str, lt: int) -> Optional[str]:
+    """Name of the dropped tag (script, style, header, nav, footer) opening at text[lt], if it is one."""
+    head = text[lt + 1:lt + 8].lower()
+    for name in _DROPPED_TAGS:
+        if head.startswith(name) and head[len(name):len(name) + 1] in _TAG_NAME_END:
+            return name
+    return None
+
+
+def _skip_raw_text(text: str, pos: int, name: str) -> int:
+    """Position just past the closing tag for name, or the end of text if it is never closed."""
+    find = text.find
+    while True:
+        close = find('</', pos)
+        if close < 0:
+            return len(text)
+        if text[close + 2:close + 2 + len(name)].lower() == name:
+            gt = find('>', close)
+            return len(text) if gt < 0 else gt + 1
+        pos = close + 2
+
+
+def _strip_tags(text: str) -> str:
+    # Jump between '<' and '>' with str.find instead of entering the regex engine per tag.
+    # Script/style and page-chrome bodies are skipped the same way, so there is no backtracking on bad markup.
+    out = []
+    append, find = out.append, text.find  # Bound once; this loop runs per tag
+    pos = 0
+    while True:
+        lt = find('<', pos)
+        if lt < 0:
+            append(text[pos:])
+            break
+        gt = find('>', lt + 1)
+        if gt < 0:
+            append(text[pos:])  # Unterminated '<' is kept as text
+            break
+        append(text[pos:lt])
+        pos = gt + 1
+        if text[lt + 1] in 'sShHnNfF':  # Cheap pre-check before looking for a dropped tag
+            name = _raw_text_tag(text, lt)
+            if name:
+                pos = _skip_raw_text(text, pos, name)
+        elif text.startswith('<!--', lt):  # A comment may contain '>', so it ends at '-->'
+            end = find('-->', lt + 4)
+            pos = len(text) if end < 0 else end + 3
+    return ''.join(out)
+
+
+def _clean_html_regex(html_content: str) -> str:
+    text = _strip_tags(html_content)
+    if '&' in text:
+        text = html.unescape(text)
+    # str.split() collapses every whitespace run and trims both ends
+    return ' '.join(text.split())
+
+
+def _word_count(text: str) -> int:
+    """Count words in clean_html output without building a list.
+
+    clean_html joins words with single spaces and trims the ends, so the
+    count is the number of spaces plus one.
+    """
+    return text.count(' ') + 1 if text else 0
 
 
 # =============================================================================
 # DEDUPLICATION
 # =============================================================================
 
-def text_fingerprint(text: str, n: int = 8) -> str:
-    words = text.lower().split(maxsplit=n)[:n]
-    fingerprint_text = ' '.join(words)
-    return hashlib.md5(fingerprint_text.encode()).hexdigest()
+# Characters of a document examined when fingerprinting; plenty for 8 words
+_FINGERPRINT_HEAD_CHARS = 512
+
 
+def text_fingerprint(text: str, n: int = 8) -> bytes:
+    # Split only a short head of the document: n+1 words in the head means the
+    # first n are complete. Fall back to a bounded split for long words.
+    words = text[:_FINGERPRINT_HEAD_CHARS].split(None, n)
+    if len(words) <= n:
+        words = text.split(None, n)
+    # Lowercase only the joined prefix, never the whole document
+    fingerprint_text = ' '.join(words[:n]).lower()
+    # 64-bit BLAKE2b: faster than MD5 and an 8-byte set key instead of 32 hex chars.
+    # 'ignore' keeps stray surrogates in scraped text from raising here.
+    return hashlib.blake2b(fingerprint_text.encode('utf-8', 'ignore'), digest_size=8).digest()
 
-def is_duplicate(text: str, seen_fingerprints: Set[str]) -> bool:
+
+def is_duplicate(text: str, seen_fingerprints: Set[bytes]) -> bool:
     fp = text_fingerprint(text)
 
     if fp in seen_fingerprints:
@@ -189,14 +483,217 @@ def is_duplicate(text: str, seen_fingerprints: Set[str]) -> bool:
     return False
 
 
+def fingerprint_many(texts: Iterable[str], n: int = 8) -> array:
+    """Fingerprint a batch of texts into a packed array of unsigned 64-bit ints.
+
+    Each value is text_fingerprint(text, n) read as a little-endian integer.
+    The array exposes the buffer protocol, so numpy.frombuffer(result,
+    dtype=numpy.uint64) gives a zero-copy view for vectorized dedup.
+    """
+    fingerprint = text_fingerprint
+    from_bytes = int.from_bytes
+    return array('Q', (from_bytes(fingerprint(text, n), 'little') for text in texts))
+
+
+def batch_dedup(texts: Iterable[str], seen_fingerprints: Set[bytes], n: int = 8) -> List[bool]:
+    """Flag duplicates across a batch of texts.
+
+    Equivalent to calling is_duplicate on each text in order, with the
+    per-call lookups hoisted out of the loop.
+
+    Returns:
+        list: True for each text whose fingerprint was already seen
+    """
+    fingerprint = text_fingerprint
+    seen = seen_fingerprints
+    add = seen.add
+    flags = []
+    append = flags.append
+
+    for text in texts:
+        fp = fingerprint(text, n)
+        if fp in seen:
+            append(True)
+        else:
+            add(fp)
+            append(False)
+
+    return flags
+
+
+def _require_datasketch():
+    if not _HAS_DATASKETCH:
+        raise ImportError("Near-duplicate detection requires datasketch: pip install 'textnano[near-dedup]'")
+
+
+def create_near_duplicate_index(threshold: float = 0.8, num_perm: int = 128) -> "MinHashLSH":
+    """Create an empty MinHash-LSH index for is_near_duplicate."""
+    _require_datasketch()
+    return MinHashLSH(threshold=threshold, num_perm=num_perm)
+
+
+def text_minhash(text: str, num_perm: int = 128, shingle_size: int = 5) -> "MinHash":
+    """MinHash signature over lowercased word shingles."""
+    _require_datasketch()
+    words = text.lower().split()
+    shingles = {' '.join(words[i:i + shingle_size])
+                for i in range(max(len(words) - shingle_size + 1, 1))}
+    m = MinHash(num_perm=num_perm)
+    m.update_batch(s.encode('utf-8') for s in shingles)
+    return m
+
+
+def is_near_duplicate(text: str, lsh: "MinHashLSH", num_perm: int = 128) -> bool:
+    """Check whether text is ~threshold-similar to a document already in lsh.
+
+    Unlike is_duplicate, this catches pages whose bodies match even when
+    their first words differ. New documents are added to the index.
+    """
+    m = text_minhash(text, num_perm=num_perm)
+    if lsh.query(m):
+        return True
+
+    key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    if key not in lsh:
+        lsh.insert(key, m)
+    return False
+
+
+# =============================================================================
+# FILTERING
+# =============================================================================
+
+# scheme://netloc/path, stopping the path at any ;params, query or fragment
+_URL_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*://([^/?#]+)([^?#;]*)')
+
+
+def _split_url(url: str) -> Tuple[str, str]:
+    """Lowercased (netloc, path) of a URL, without building a urlparse result."""
+    m = _URL_RE.match(url)
+    if not m:
+        return '', ''
+    return m.group(1).lower(), m.group(2).lower()
+
+
+def _build_exclude_filters(exclude_domains: Optional[List[str]], exclude_extensions: Optional[List[str]],
+                           use_default_excludes: bool = True) -> Tuple[Optional[Pattern[str]], Tuple[str, ...]]:
+    """Precompute the exclusion checks so each URL is tested with one C-level call per list.
+
+    Returns:
+        tuple: (domain_re, extension_suffixes). domain_re matches any excluded
+        domain as a substring of the netloc (None when there are none);
+        extension_suffixes is a tuple of '.ext' strings for str.endswith on
+        the lowercased path.
+    """
+    domains = set(exclude_domains or [])
+    extensions = set(ext.lower().lstrip('.') for ext in (exclude_extensions or []))
+    if use_default_excludes:
+        domains |= DEFAULT_EXCLUDE_DOMAINS_SET
+        extensions |= DEFAULT_EXCLUDE_EXTENSIONS_SET
+
+    domain_re = re.compile('|'.join(re.escape(d) for d in sorted(domains))) if domains else None
+    extension_suffixes = tuple(f'.{ext}' for ext in sorted(extensions))
+    return domain_re, extension_suffixes
+
+
+def _exclusion_reason(url: str, domain_re: Optional[Pattern[str]],
+                      extension_suffixes: Tuple[str, ...]) -> Optional[str]:
+    """Why a URL is filtered out before download, or None to fetch it.
+
+    The reason is the tag written to failed.txt: bad_scheme, excluded_domain
+    or excluded_extension. The scheme prefix check runs first (case-insensitively,
+    on the first 8 characters only), so junk such as mailto: and javascript:
+    links never reach the URL split.
+    """
+    if not url[:8].lower().startswith(('http://', 'https://')):
+        return 'bad_scheme'
+    netloc, path_lower = _split_url(url)
+    if domain_re and domain_re.search(netloc):
+        return 'excluded_domain'
+    if extension_suffixes and path_lower.endswith(extension_suffixes):
+        return 'excluded_extension'
+    return None
+
+
 # =============================================================================
 # MAIN PIPELINE
 # =============================================================================
 
+def _iter_urls(url_file: str, max_urls: Optional[int] = None) -> Iterator[str]:
+    """Yield one URL per line, skipping blanks and repeated URLs (first occurrence wins).
+
+    Stops after max_urls distinct URLs. Seen URLs are kept as 8-byte BLAKE2b
+    digests rather than strings: still exact in practice, so no unique URL is
+    dropped, at a fraction of the memory. The number of repeats skipped is logged.
+    """
+    seen = set()
+    repeats = 0
+    try:
+        with open(url_file) as f:
+            for line in f:
+                url = line.strip()
+                if not url:
+                    continue
+                key = hashlib.blake2b(url.encode('utf-8', 'ignore'), digest_size=8).digest()
+                if key in seen:
+                    repeats += 1
+                    continue
+                if max_urls and len(seen) >= max_urls:
+                    return
+                seen.add(key)
+                yield url
+    finally:
+        if repeats:
+            logging.info(f"Skipped {repeats} repeated URLs in {url_file}")
+
+
+def _read_urls(url_file: str, max_urls: Optional[int] = None) -> List[str]:
+    """All URLs from _iter_urls as a list."""
+    return list(_iter_urls(url_file, max_urls))
+
+
+def _write_doc(path: str, url: str, text: str):
+    """Write a document file: URL on the first line, then a blank line, then the text."""
+    with open(path, 'w') as f:
+        f.write(url)
+        f.write('\n\n')
+        f.write(text)
+
+
+class _ProgressLogger:
+    """Aggregate per-URL outcomes and log a progress line at most once per interval."""
+
+    def __init__(self, total: int, interval: float = PROGRESS_LOG_INTERVAL):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.counts: Counter = Counter()
+        self._next_emit = time.monotonic() + interval
+
+    def event(self, outcome: str, url: str, detail: str = ''):
+        """Record one finished URL; the per-URL line only goes to DEBUG."""
+        self.done += 1
+        self.counts[outcome] += 1
+        logging.debug(f"{outcome} {url} {detail}".rstrip())
+        now = time.monotonic()
+        if now >= self._next_emit:
+            self._next_emit = now + self.interval
+            self.emit()
+
+    def emit(self):
+        c = self.counts
+        logging.info(f"[{self.done}/{self.total}] ok={c['success']} fail={c['failed']} "
+                     f"dup={c['duplicates']} short={c['too_short']} excluded={c['excluded']}")
+
+
 async def download_and_clean_async(url_file: str, output_dir: str, min_words: int = 50, max_urls: Optional[int] = None,
                                    exclude_domains: Optional[List[str]] = None, exclude_extensions: Optional[List[str]] = None,
                                    use_default_excludes: bool = True, max_concurrent: int = 10,
-                                   respect_robots: bool = True, timeout: int = 30) -> Dict[str, int]:
+                                   respect_robots: bool = True, timeout: int = 30,
+                                   robots_cache: Optional[str] = None,
+                                   near_duplicates: bool = False,
+                                   max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                                   max_per_host: int = 4) -> Dict[str, int]:
     """Download text from URLs asynchronously, clean, and deduplicate.
 
     Args:
@@ -210,6 +707,10 @@ async def download_and_clean_async(url_file: str, output_dir: str, min_words: in
         max_concurrent: Maximum concurrent requests (default: 10)
         respect_robots: Respect robots.txt (default: True)
         timeout: Request timeout in seconds (default: 30)
+        robots_cache: SQLite file to persist robots.txt across runs (default: None = in-memory only)
+        near_duplicates: Also drop near-duplicates via MinHash-LSH, requires datasketch (default: False)
+        max_bytes: Maximum response body size in bytes (default: 10 MB, None = unlimited)
+        max_per_host: Maximum concurrent requests to a single host (default: 4)
 
     Output structure:
         output_dir/
@@ -225,108 +726,138 @@ async def download_and_clean_async(url_file: str, output_dir: str, min_words: in
     os.makedirs(output_dir, exist_ok=True)
 
     # Normalize filters
-    if use_default_excludes:
-        exclude_domains = set(exclude_domains or []) | set(DEFAULT_EXCLUDE_DOMAINS)
-        exclude_extensions = set(ext.lower().lstrip('.') for ext in (exclude_extensions or [])) | set(DEFAULT_EXCLUDE_EXTENSIONS)
-    else:
-        exclude_domains = set(exclude_domains or [])
-        exclude_extensions = set(ext.lower().lstrip('.') for ext in (exclude_extensions or []))
-
-    # Read URLs
-    with open(url_file) as f:
-        urls = [line.strip() for line in f if line.strip()]
+    domain_re, extension_suffixes = _build_exclude_filters(exclude_domains, exclude_extensions, use_default_excludes)
 
-    if max_urls:
-        urls = urls[:max_urls]
+    # Read URLs (the crawler groups them by host up front, so it needs the full list)
+    urls = _read_urls(url_file, max_urls)
 
     # Deduplication
-    seen_fingerprints = set()
+    seen_fingerprints = _new_fingerprint_store(len(urls))
+    near_index = create_near_duplicate_index() if near_duplicates else None
 
-    # Counters
+    # Counters (each worker counts locally; totals are merged once the workers finish)
     stats = {'success': 0, 'failed': 0, 'duplicates': 0, 'too_short': 0, 'excluded': 0, 'robots_blocked': 0}
-
-    # Logging files
-    success_log_path = os.path.join(output_dir, 'success.txt')
-    failed_log_path = os.path.join(output_dir, 'failed.txt')
+    file_counter = itertools.count(1)  # Output numbering, independent of the stats
+
+    # Logging files (kept open for the whole run, buffered and flushed periodically).
+    # Workers enqueue lines and a single writer task drains them, so no lock is needed.
+    success_log = open(os.path.join(output_dir, 'success.txt'), 'a', buffering=LOG_BUFFER_SIZE)
+    failed_log = open(os.path.join(output_dir, 'failed.txt'), 'a', buffering=LOG_BUFFER_SIZE)
+    log_queue: asyncio.Queue = asyncio.Queue()
+
+    async def drain_logs():
+        log_writes = 0
+        while True:
+            log_file, line = await log_queue.get()
+            log_file.write(line)
+            log_writes += 1
+            if log_writes % LOG_FLUSH_INTERVAL == 0:
+                success_log.flush()
+                failed_log.flush()
+            log_queue.task_done()
 
     logging.info(f"Processing {len(urls)} URLs with up to {max_concurrent} concurrent requests...")
+    progress = _ProgressLogger(len(urls))
 
     # Process URLs concurrently
     semaphore = asyncio.Semaphore(max_concurrent)
 
-    async def process_url(idx: int, url: str, client: httpx.AsyncClient):
-        """Process a single URL."""
+    async def process_url(url: str, client: httpx.AsyncClient, counts: Counter):
+        """Process a single URL, recording its outcome in the worker's counts."""
         async with semaphore:
-            logging.info(f"[{idx}/{len(urls)}] {url[:60]}...")
-
-            # Check exclusion filters
-            parsed = urlparse(url)
-
-            # Check domain exclusion
-            if exclude_domains and any(domain in parsed.netloc for domain in exclude_domains):
-                async with asyncio.Lock():
-                    with open(failed_log_path, 'a') as f:
-                        f.write(f"{url}\texcluded_domain\n")
-                stats['excluded'] += 1
-                logging.info("  ⊘ Excluded domain")
-                return
-
-            # Check extension exclusion
-            if exclude_extensions:
-                path_lower = parsed.path.lower()
-                if any(path_lower.endswith(f'.{ext}') for ext in exclude_extensions):
-                    async with asyncio.Lock():
-                        with open(failed_log_path, 'a') as f:
-                            f.write(f"{url}\texcluded_extension\n")
-                    stats['excluded'] += 1
-                    logging.info("  ⊘ Excluded extension")
-                    return
-
             # Download
-            text = await download_text_async(url, client, timeout=timeout, respect_robots=respect_robots)
+            text = await download_text_async(url, client, timeout=timeout, respect_robots=respect_robots,
+                                             max_bytes=max_bytes)
 
             if not text:
-                async with asyncio.Lock():
-                    with open(failed_log_path, 'a') as f:
-                        f.write(f"{url}\n")
-                stats['failed'] += 1
-                logging.warning("  ✗ Failed to download")
+                log_queue.put_nowait((failed_log, f"{url}\n"))
+                counts['failed'] += 1
+                progress.event('failed', url)
                 return
 
             # Check length
-            word_count = len(text.split())
+            word_count = _word_count(text)
             if word_count < min_words:
-                async with asyncio.Lock():
-                    with open(failed_log_path, 'a') as f:
-                        f.write(f"{url}\ttoo_short:{word_count}\n")
-                stats['too_short'] += 1
-                logging.info(f"  ⊘ Too short ({word_count} words)")
+                log_queue.put_nowait((failed_log, f"{url}\ttoo_short:{word_count}\n"))
+                counts['too_short'] += 1
+                progress.event('too_short', url, f"{word_count} words")
                 return
 
             # Check duplicate
             if is_duplicate(text, seen_fingerprints):
-                stats['duplicates'] += 1
-                logging.info("  ⊘ Duplicate")
+                counts['duplicates'] += 1
+                progress.event('duplicates', url)
                 return
 
-            # Save
-            async with asyncio.Lock():
-                output_file = os.path.join(output_dir, f"{stats['success']+1:04d}.txt")
-                with open(output_file, 'w') as f:
-                    f.write(f"{url}\n\n")  # First line = URL
-                    f.write(text)
+            if near_index is not None and is_near_duplicate(text, near_index):
+                counts['duplicates'] += 1
+                progress.event('duplicates', url, 'near')
+                return
 
-                with open(success_log_path, 'a') as f:
-                    f.write(f"{url}\n")
+            # Save (written in a worker thread so large documents don't stall the event loop)
+            output_file = os.path.join(output_dir, f"{next(file_counter):04d}.txt")
+            await asyncio.to_thread(_write_doc, output_file, url, text)
 
-                stats['success'] += 1
-                logging.info(f"  ✓ Saved ({word_count} words)")
+            log_queue.put_nowait((success_log, f"{url}\n"))
+            counts['success'] += 1
+            progress.event('success', url, f"{word_count} words")
 
-    # Create client with connection pooling
-    limits = httpx.Limits(max_keepalive_connections=max_concurrent, max_connections=max_concurrent * 2)
-    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
-        tasks = [process_url(idx, url, client) for idx, url in enumerate(urls, 1)]
-        await asyncio.gather(*tasks, return_exceptions=True)
+    if respect_robots and robots_cache:
+        open_robots_cache(robots_cache)
+
+    # Create client with connection pooling (HTTP/2 multiplexing when h2 is available).
+    # httpx advertises gzip/deflate, plus br and zstd when their decoders are installed.
+    limits = httpx.Limits(max_keepalive_connections=max_concurrent * 2, max_connections=max_concurrent * 4,
+                          keepalive_expiry=KEEPALIVE_EXPIRY)
+    log_writer = asyncio.create_task(drain_logs())
+    try:
+        async with httpx.AsyncClient(http2=_HAS_HTTP2, limits=limits, timeout=_request_timeout(timeout),
+                                     follow_redirects=True) as client:
+            # Bucket URLs by host and run up to max_per_host workers per bucket: a host
+            # never sees more than max_per_host requests and its URLs reuse warm connections
+            # Excluded URLs are logged here and never reach a worker
+            host_queues: Dict[str, deque] = defaultdict(deque)
+            for url in urls:
+                reason = _exclusion_reason(url, domain_re, extension_suffixes)
+                if reason:
+                    log_queue.put_nowait((failed_log, f"{url}\t{reason}\n"))
+                    stats['excluded'] += 1
+                    progress.event('excluded', url, reason)
+                    continue
+                host_queues[_split_url(url)[0]].append(url)
+
+            async def host_worker(queue: deque) -> Counter:
+                counts: Counter = Counter()
+                while queue:
+                    url = queue.popleft()
+                    try:
+                        await process_url(url, client, counts)
+                    except Exception as e:
+                        logging.error(f"Unexpected error processing {url}: {type(e).__name__}: {e}")
+                return counts
+
+            workers = [host_worker(queue) for queue in host_queues.values()
+                       for _ in range(min(max_per_host, len(queue)))]
+            for counts in await asyncio.gather(*workers):
+                for key, value in counts.items():
+                    stats[key] += value
+            progress.emit()
+        # If the writer dies (e.g. disk full) the queue never empties, so don't wait on it alone
+        log_flushed = asyncio.create_task(log_queue.join())
+        await asyncio.wait({log_writer, log_flushed}, return_when=asyncio.FIRST_COMPLETED)
+        log_flushed.cancel()
+        if log_writer.done():
+            log_writer.result()  # Re-raises the writer's error
+    finally:
+        log_writer.cancel()
+        try:
+            while not log_queue.empty():  # Only non-empty if the crawl was interrupted
+                log_file, line = log_queue.get_nowait()
+                log_file.write(line)
+        finally:
+            success_log.close()
+            failed_log.close()
+            close_robots_cache()
 
     # Print summary
     print_stats(stats)
@@ -336,9 +867,13 @@ async def download_and_clean_async(url_file: str, output_dir: str, min_words: in
 
 def download_and_clean(url_file: str, output_dir: str, min_words: int = 50, max_urls: Optional[int] = None,
                        exclude_domains: Optional[List[str]] = None, exclude_extensions: Optional[List[str]] = None,
-                       use_default_excludes: bool = True) -> Dict[str, int]:
+                       use_default_excludes: bool = True, near_duplicates: bool = False,
+                       max_workers: int = 10, max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> Dict[str, int]:
     """Download text from URLs, clean, and deduplicate.
 
+    Downloads run on a thread pool; filtering, dedup and saving stay on the
+    calling thread in URL order, so the output numbering is deterministic.
+
     Args:
         url_file: Path to file with one URL per line
         output_dir: Directory to save text files
@@ -347,6 +882,9 @@ def download_and_clean(url_file: str, output_dir: str, min_words: int = 50, max_
         exclude_domains: List of domains to exclude (default: None, uses defaults if use_default_excludes=True)
         exclude_extensions: List of file extensions to exclude (default: None, uses defaults if use_default_excludes=True)
         use_default_excludes: Use default exclusion lists (default: True)
+        near_duplicates: Also drop near-duplicates via MinHash-LSH, requires datasketch (default: False)
+        max_workers: Number of download threads (default: 10)
+        max_bytes: Maximum response body size in bytes (default: 10 MB, None = unlimited)
 
     Output structure:
         output_dir/
@@ -362,86 +900,95 @@ def download_and_clean(url_file: str, output_dir: str, min_words: int = 50, max_
     os.makedirs(output_dir, exist_ok=True)
 
     # Normalize filters
-    if use_default_excludes:
-        exclude_domains = set(exclude_domains or []) | set(DEFAULT_EXCLUDE_DOMAINS)
-        exclude_extensions = set(ext.lower().lstrip('.') for ext in (exclude_extensions or [])) | set(DEFAULT_EXCLUDE_EXTENSIONS)
-    else:
-        exclude_domains = set(exclude_domains or [])
-        exclude_extensions = set(ext.lower().lstrip('.') for ext in (exclude_extensions or []))
-
-    # Read URLs
-    with open(url_file) as f:
-        urls = [line.strip() for line in f if line.strip()]
-
-    if max_urls:
-        urls = urls[:max_urls]
+    domain_re, extension_suffixes = _build_exclude_filters(exclude_domains, exclude_extensions, use_default_excludes)
 
-    # Deduplication
-    seen_fingerprints = set()
+    # Deduplication (the URL count isn't known up front, so size the store from the file)
+    seen_fingerprints = _new_fingerprint_store(_expected_url_count([url_file], max_urls))
+    near_index = create_near_duplicate_index() if near_duplicates else None
 
     # Counters
     stats = {'success': 0, 'failed': 0, 'duplicates': 0, 'too_short': 0, 'excluded': 0}
+    file_counter = itertools.count(1)  # Output numbering, independent of the stats
 
     # Process each URL
-    logging.info(f"Processing {len(urls)} URLs...")
-
-    with open(os.path.join(output_dir, 'success.txt'), 'w') as success_log, \
-         open(os.path.join(output_dir, 'failed.txt'), 'w') as failed_log:
-
-        for idx, url in enumerate(urls, 1):
-            logging.info(f"[{idx}/{len(urls)}] {url[:60]}...")
-
-            # Check exclusion filters
-            parsed = urlparse(url)
-
-            # Check domain exclusion
-            if exclude_domains and any(domain in parsed.netloc for domain in exclude_domains):
-                failed_log.write(f"{url}\texcluded_domain\n")
-                stats['excluded'] += 1
-                logging.info("  ⊘ Excluded domain")
-                continue
-
-            # Check extension exclusion
-            if exclude_extensions:
-                path_lower = parsed.path.lower()
-                if any(path_lower.endswith(f'.{ext}') for ext in exclude_extensions):
-                    failed_log.write(f"{url}\texcluded_extension\n")
+    logging.info(f"Processing URLs from {url_file}...")
+    verbose = logging.getLogger().isEnabledFor(logging.INFO)  # Skip building per-URL messages when quiet
+
+    with open(os.path.join(output_dir, 'success.txt'), 'w', buffering=LOG_BUFFER_SIZE) as success_log, \
+         open(os.path.join(output_dir, 'failed.txt'), 'w', buffering=LOG_BUFFER_SIZE) as failed_log:
+
+        def fetchable():
+            """URLs streamed from the file, with excluded ones logged and dropped."""
+            for idx, url in enumerate(_iter_urls(url_file, max_urls), 1):
+                reason = _exclusion_reason(url, domain_re, extension_suffixes)
+                if reason:
+                    failed_log.write(f"{url}\t{reason}\n")
                     stats['excluded'] += 1
-                    logging.info("  ⊘ Excluded extension")
+                    if verbose:
+                        logging.info(f"[{idx}] ⊘ {reason}: {url[:60]}")
                     continue
+                yield idx, url
 
-            # Download
-            text = download_text(url)
+        def handle(idx: int, url: str, text: str):
+            """Filter, dedup and save one downloaded document (calling thread only)."""
+            if verbose:
+                logging.info(f"[{idx}] {url[:60]}...")
 
             if not text:
                 failed_log.write(f"{url}\n")
                 stats['failed'] += 1
                 logging.warning("  ✗ Failed to download")
-                continue
+                return
 
             # Check length
-            word_count = len(text.split())
+            word_count = _word_count(text)
             if word_count < min_words:
                 failed_log.write(f"{url}\ttoo_short:{word_count}\n")
                 stats['too_short'] += 1
-                logging.info(f"  ⊘ Too short ({word_count} words)")
-                continue
+                if verbose:
+                    logging.info(f"  ⊘ Too short ({word_count} words)")
+                return
 
             # Check duplicate
             if is_duplicate(text, seen_fingerprints):
                 stats['duplicates'] += 1
                 logging.info("  ⊘ Duplicate")
-                continue
+                return
+
+            if near_index is not None and is_near_duplicate(text, near_index):
+                stats['duplicates'] += 1
+                logging.info("  ⊘ Near-duplicate")
+                return
 
             # Save
-            output_file = os.path.join(output_dir, f"{stats['success']+1:04d}.txt")
-            with open(output_file, 'w') as f:
-                f.write(f"{url}\n\n")  # First line = URL
-                f.write(text)
+            output_file = os.path.join(output_dir, f"{next(file_counter):04d}.txt")
+            _write_doc(output_file, url, text)
 
             success_log.write(f"{url}\n")
             stats['success'] += 1
-            logging.info(f"  ✓ Saved ({word_count} words)")
+            if verbose:
+                logging.info(f"  ✓ Saved ({word_count} words)")
+
+        # Download in parallel through a bounded window of in-flight requests, handling
+        # results in URL order; only the window is held in memory, never the URL list
+        window = max_workers * 2
+        pending: deque = deque()
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            for idx, url in fetchable():
+                pending.append((idx, url, pool.submit(download_text, url, max_bytes=max_bytes)))
+                if len(pending) >= window:
+                    idx, url, future = pending.popleft()
+                    handle(idx, url, future.result())
+            while pending:
+                idx, url, future = pending.popleft()
+                handle(idx, url, future.result())
+        except BaseException:
+            # Ctrl-C or an error: drop queued downloads instead of waiting for the whole window
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        else:
+            pool.shutdown()
 
     # Print summary
     print_stats(stats)
@@ -3,6 +3,8 @@
 
 from pathlib import Path
 
+from textnano.utils import _expected_url_count, _new_fingerprint_store
+
 
 def extract_reddit_urls(input_dir, output_file='reddit_urls.txt', max_urls=None):
     """Merge Reddit URL files into single deduplicated list.
@@ -14,7 +16,6 @@ def extract_reddit_urls(input_dir, output_file='reddit_urls.txt', max_urls=None)
     print(f"Processing Reddit URL files: {input_dir}")
     print(f"Max URLs: {max_urls if max_urls else 'unlimited'}")
 
-    seen_urls = set()
     url_count = 0
 
     # Find all RS_*.txt files
@@ -24,6 +25,10 @@ def extract_reddit_urls(input_dir, output_file='reddit_urls.txt', max_urls=None)
         print(f"No RS_*.txt files found in {input_dir}")
         return 0
 
+    # An exact set for small inputs; at Reddit scale a Bloom filter keeps memory
+    # bounded, at the cost of rarely dropping a unique URL as already seen
+    seen_urls = _new_fingerprint_store(_expected_url_count(url_files, max_urls))
+
     with open(output_file, 'w', encoding='utf-8') as out:
         for url_file in url_files:
             print(f"Processing {url_file.name}...")
@@ -1,13 +1,71 @@
 #!/usr/bin/env python3
 """Wikipedia extractor - extracts URLs from wikiextractor JSON output."""
 
+import os
+import re
 import json
-from pathlib import Path
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 
+# Files queued per worker process before results are consumed
+FILES_PER_WORKER = 4
 
-def extract_wikipedia_urls(input_dir, output_file='wikipedia_urls.txt', max_urls=None):
+# wikiextractor writes one flat JSON object per line with "url" before "text",
+# so the field can be pulled out without parsing the (large) article body.
+# Values containing escapes don't match and go through json.loads instead.
+_URL_FIELD_RE = re.compile(rb'"url"\s*:\s*"([^"\\]*)"')
+
+
+def _iter_wiki_files(input_dir):
+    """Yield wiki_* files under input_dir lazily, in sorted order."""
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith('wiki_'):
+                yield os.path.join(root, name)
+
+
+def _urls_in_file(wiki_file):
+    """URLs of every document in one wiki_* file, in file order."""
+    urls = []
+    with open(wiki_file, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            try:
+                match = _URL_FIELD_RE.search(line)
+                if match:
+                    url = match.group(1).decode('utf-8')
+                else:
+                    url = json.loads(line).get('url', '')
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+
+            if url:
+                urls.append(url)
+    return urls
+
+
+def _url_lists(wiki_files, pool, batch_size):
+    """URL lists of wiki_files in order, parsed in pool when given, else in this process."""
+    if pool is None:
+        yield from map(_urls_in_file, wiki_files)
+        return
+    # Submit a bounded batch of files at a time so parsed results don't pile up
+    while batch := list(itertools.islice(wiki_files, batch_size)):
+        yield from pool.map(_urls_in_file, batch)
+
+
+def extract_wikipedia_urls(input_dir, output_file='wikipedia_urls.txt', max_urls=None, max_workers=None):
     """Extract deduplicated URLs from wikiextractor JSON output.
 
+    Files are parsed in this process by default. max_workers > 1 parses them
+    in worker processes; with the spawn or forkserver start method the
+    calling script then needs an ``if __name__ == '__main__':`` guard. Dedup
+    and writing stay in this process, in file order, so the output is the
+    same either way.
+
     Expects input from: python -m wikiextractor.WikiExtractor dump.xml.bz2 --json -o input_dir/
     Output: Text file with one URL per line (deduplicated)
     """
@@ -17,34 +75,30 @@ def extract_wikipedia_urls(input_dir, output_file='wikipedia_urls.txt', max_urls
     seen_urls = set()
     url_count = 0
 
-    # Find all wiki_* files recursively
-    wiki_files = sorted(Path(input_dir).rglob('wiki_*'))
+    wiki_files = _iter_wiki_files(input_dir)
+    pool = ProcessPoolExecutor(max_workers=max_workers) if max_workers and max_workers > 1 else None
 
-    with open(output_file, 'w', encoding='utf-8') as out:
-        for wiki_file in wiki_files:
-            with open(wiki_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if not line.strip():
+    try:
+        with open(output_file, 'w', encoding='utf-8') as out:
+            for urls in _url_lists(wiki_files, pool, FILES_PER_WORKER * (max_workers or 1)):
+                for url in urls:
+                    if url in seen_urls:
                         continue
 
-                    try:
-                        doc = json.loads(line)
-                        url = doc.get('url', '')
+                    out.write(f"{url}\n")
+                    seen_urls.add(url)
+                    url_count += 1
 
-                        if url and url not in seen_urls:
-                            out.write(f"{url}\n")
-                            seen_urls.add(url)
-                            url_count += 1
+                    if url_count % 1000 == 0:
+                        print(f"Extracted {url_count} URLs...")
 
-                            if url_count % 1000 == 0:
-                                print(f"Extracted {url_count} URLs...")
-
-                            if max_urls and url_count >= max_urls:
-                                print(f"\nExtracted {url_count} unique URLs to {output_file}")
-                                return url_count
-
-                    except json.JSONDecodeError:
-                        continue
+                    if max_urls and url_count >= max_urls:
+                        print(f"\nExtracted {url_count} unique URLs to {output_file}")
+                        return url_count
+    finally:
+        if pool:
+            # After an early max_urls return, drop the files still queued
+            pool.shutdown(cancel_futures=True)
 
     print(f"\nExtracted {url_count} unique URLs to {output_file}")
     print(f"\nNext step: textnano urls {output_file} output_dir/")
@@ -2,7 +2,15 @@
 """Utility functions for textnano."""
 
 import os
-from pathlib import Path
+import math
+import shutil
+import functools
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .config import (BLOOM_DEDUP_THRESHOLD, BLOOM_ERROR_RATE, BLOOM_MIN_CAPACITY, PARALLEL_STATS_MIN_FILES,
+                     MERGE_HEAD_CHARS, AVG_URL_BYTES, URL_ESTIMATE_HEADROOM)
 
 
 def print_stats(stats, title="SUMMARY"):
@@ -23,19 +31,46 @@ def print_stats(stats, title="SUMMARY"):
     print("="*60)
 
 
-def estimate_dataset_size(output_dir):
-    """Get statistics about the dataset."""
-    txt_files = list(Path(output_dir).glob('*.txt'))
-    txt_files = [f for f in txt_files if f.stem.isdigit()]
-
-    total_words = 0
-    total_chars = 0
-
-    for file in txt_files:
-        with open(file) as f:
-            content = f.read()
-            total_words += len(content.split())
-            total_chars += len(content)
+def _count_words(path, chunk_size=1 << 16):
+    """Count whitespace-separated words in a file, reading it in fixed-size chunks."""
+    words = 0
+    prev_in_word = False
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            words += len(chunk.split())
+            # A word split across the chunk boundary was counted twice
+            if prev_in_word and not chunk[:1].isspace():
+                words -= 1
+            prev_in_word = not chunk[-1:].isspace()
+    return words
+
+
+def _dataset_entries(directory):
+    """Numbered document files (0001.txt, ...) in a dataset directory, sorted by name."""
+    with os.scandir(directory) as it:
+        entries = [entry for entry in it
+                   if entry.name.endswith('.txt') and entry.name[:-4].isdigit() and entry.is_file()]
+    return sorted(entries, key=lambda entry: entry.name)
+
+
+def estimate_dataset_size(output_dir, max_workers=None):
+    """Get statistics about the dataset.
+
+    Words are counted in this process by default. max_workers > 1 counts
+    large datasets in worker processes; with the spawn or forkserver start
+    method the calling script then needs an ``if __name__ == '__main__':`` guard.
+    """
+    txt_files = _dataset_entries(output_dir)
+
+    # Sizes come from stat(), so 'chars' counts bytes (equal for ASCII text)
+    total_chars = sum(entry.stat().st_size for entry in txt_files)
+    paths = [entry.path for entry in txt_files]
+    if not max_workers or max_workers < 2 or len(paths) < PARALLEL_STATS_MIN_FILES:
+        # Small datasets: process startup would cost more than the counting
+        total_words = sum(map(_count_words, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            total_words = sum(pool.map(_count_words, paths, chunksize=32))
 
     return {
         'files': len(txt_files),
@@ -46,27 +81,123 @@ def estimate_dataset_size(output_dir):
     }
 
 
-def merge_datasets(*dirs, output_dir, is_duplicate_func):
-    """Merge multiple datasets and deduplicate."""
-    os.makedirs(output_dir, exist_ok=True)
-
-    seen_fingerprints = set()
-    output_idx = 1
+def _read_head(path, nchars=None):
+    """Read the first nchars characters of a file, or all of it when nchars is None."""
+    with open(path) as f:
+        return f.read(nchars)
 
-    for input_dir in dirs:
-        txt_files = sorted(Path(input_dir).glob('[0-9]*.txt'))
 
-        for file in txt_files:
-            with open(file) as f:
-                content = f.read()
+def merge_datasets(*dirs, output_dir, is_duplicate_func=None, max_workers=16, head_chars=None):
+    """Merge multiple datasets and deduplicate.
 
-            if is_duplicate_func(content, seen_fingerprints):
-                continue
+    By default documents are deduplicated with core.is_duplicate, whose
+    fingerprint only covers the first words, so only the first
+    MERGE_HEAD_CHARS characters of each file are read. A custom
+    is_duplicate_func receives each file's full text, or only its first
+    head_chars characters when set. Kept files are copied whole.
+    """
+    if is_duplicate_func is None:
+        from .core import is_duplicate as is_duplicate_func  # core imports this module
+        if head_chars is None:
+            head_chars = MERGE_HEAD_CHARS
 
-            output_file = os.path.join(output_dir, f"{output_idx:04d}.txt")
-            with open(output_file, 'w') as f:
-                f.write(content)
+    os.makedirs(output_dir, exist_ok=True)
 
-            output_idx += 1
+    txt_files = [entry.path for input_dir in dirs for entry in _dataset_entries(input_dir)]
+    seen_fingerprints = _new_fingerprint_store(len(txt_files))
 
-    print(f"Merged {output_idx-1} unique documents from {len(dirs)} datasets")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Dedup runs in input order so numbering is deterministic. Reads are submitted
+        # a bounded window ahead, so only that many files are held in memory at once.
+        read = functools.partial(_read_head, nchars=head_chars)
+        window = max_workers * 2
+        pending = deque()
+        kept = []
+        for file in txt_files:
+            pending.append((file, pool.submit(read, file)))
+            if len(pending) >= window:
+                file, future = pending.popleft()
+                if not is_duplicate_func(future.result(), seen_fingerprints):
+                    kept.append(file)
+        while pending:
+            file, future = pending.popleft()
+            if not is_duplicate_func(future.result(), seen_fingerprints):
+                kept.append(file)
+
+        outputs = [os.path.join(output_dir, f"{idx:04d}.txt") for idx in range(1, len(kept) + 1)]
+        list(pool.map(shutil.copyfile, kept, outputs))
+
+    print(f"Merged {len(kept)} unique documents from {len(dirs)} datasets")
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter with the add/in/len interface of a set.
+
+    Stands in for seen_fingerprints on very large crawls: about 14 bits per
+    item at a 0.1% false-positive rate versus ~100 bytes per set entry.
+    A false positive drops a unique document as a duplicate; a duplicate is
+    never missed.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self._last = (None, None)
+
+    def _positions(self, item):
+        # is_duplicate checks membership and then adds the same item, so the
+        # positions of the last item are reused rather than rehashed
+        last_item, last_positions = self._last
+        if item == last_item:
+            return last_positions
+        key = item.encode('utf-8') if isinstance(item, str) else item
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        # Double hashing: k positions from two 64-bit halves of one digest
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        positions = [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+        self._last = (item, positions)
+        return positions
+
+    def add(self, item):
+        added = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self):
+        """Number of distinct items added (approximate)."""
+        return self.count
+
+
+def _expected_url_count(paths, max_urls=None):
+    """Upper estimate of the URLs in URL files, from their sizes, for sizing a store.
+
+    Padded by URL_ESTIMATE_HEADROOM so files of short URLs don't overfill a
+    Bloom filter, and capped at max_urls when set.
+    """
+    estimate = sum(os.path.getsize(path) for path in paths) // AVG_URL_BYTES * URL_ESTIMATE_HEADROOM
+    return min(max_urls, estimate) if max_urls else estimate
+
+
+def _new_fingerprint_store(expected_docs):
+    """Set of seen fingerprints, or a Bloom filter for very large runs.
+
+    The Bloom filter is used above BLOOM_DEDUP_THRESHOLD documents or when
+    the TEXTNANO_BLOOM environment variable is set, and never holds fewer
+    than BLOOM_MIN_CAPACITY items.
+    """
+    if expected_docs > BLOOM_DEDUP_THRESHOLD or os.environ.get('TEXTNANO_BLOOM'):
+        return BloomFilter(capacity=max(expected_docs, BLOOM_MIN_CAPACITY), error_rate=BLOOM_ERROR_RATE)
+    return set()